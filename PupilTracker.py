@@ -8,9 +8,81 @@ Pupil tracking class.
 # Distributed under the terms of the GNU General Public License (GPL).
 
 from __future__ import division, print_function
+import threading
 import cv2
 import numpy as np
 
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue
+
+# numba is optional; without it the contour filters run as plain numpy
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """
+        Stand in for numba.njit, leaves function as is.
+        """
+        return lambda func: func
+
+# pupils must have circularity (circumference**2 / (4*pi*area), 1 for a
+# circle) below 1.6; folded so that each contour needs no division
+CIRCULARITY_THRESH = 1.6 * 4 * np.pi
+
+# once the tracked pupil is measured within STEADY_INNOVATION px of its
+# predicted center for STEADY_FRAMES frames in a row, it is drawn at the
+# prediction without searching, for at most MAX_COAST_FRAMES frames between
+# measurements
+STEADY_INNOVATION = 1.0
+STEADY_FRAMES = 3
+MAX_COAST_FRAMES = 2
+
+
+@njit(cache=True)
+def filter_pupils(areas, hull_sizes, circumferences, area_lo, area_hi):
+    """
+    Tests possible pupils: drops small and large, too few points, and too
+    eccentric.
+
+    :param areas: contour areas
+    :param hull_sizes: number of points in each contour's convex hull
+    :param circumferences: arc length of each convex hull
+    :param area_lo: smallest area allowed
+    :param area_hi: largest area allowed
+    :return: mask of contours that pass
+    """
+    return ((area_lo < areas) & (areas < area_hi) &
+            (hull_sizes >= 5) &
+            (circumferences * circumferences < CIRCULARITY_THRESH * areas))
+
+
+@njit(cache=True)
+def filter_refle(areas, sizes, centers, area_lo, area_hi, roi):
+    """
+    Tests possible reflections: drops small and large, not square, and
+    centered outside the roi.
+
+    :param areas: contour areas
+    :param sizes: width and height of each contour's min area rect
+    :param centers: integer center of each min area rect
+    :param area_lo: smallest area allowed
+    :param area_hi: largest area allowed
+    :param roi: bounds centers must be inside, as x1, y1, x2, y2
+    :return: mask of contours that pass
+    """
+    w = sizes[:, 0]
+    h = sizes[:, 1]
+    cx = centers[:, 0]
+    cy = centers[:, 1]
+
+    return ((area_lo < areas) & (areas < area_hi) &
+            # squareness, h / w between 0.5 and 2
+            (0.5 * w < h) & (h < 2 * w) &
+            (roi[0] < cx) & (cx < roi[2]) &
+            (roi[1] < cy) & (cy < roi[3]))
+
 
 class PupilTracker(object):
     """
@@ -28,17 +100,52 @@ class PupilTracker(object):
         self.cap = None
         self.out = None
 
+        # background decoding; frames are queued as (frames advanced, frame,
+        # display frame), with None marking the end of the video and an
+        # exception a failed decode
+        self.reader = None
+        self.reader_stop = None
+        self.frame_queue = queue.Queue(maxsize=2)
+
+        # ring of reused buffers that frames are decoded into, as lists of
+        # raw, frame and display buffers. Needs a slot per frame that
+        # can be alive at once: queued for tracking, queued for paint (see
+        # ImagePanel), being tracked, and being decoded.
+        ring_size = 2 * self.frame_queue.maxsize + 2
+        self.raw_ring = [None] * ring_size
+        self.frame_ring = [None] * ring_size
+        self.display_ring = [None] * ring_size
+        self.ring_index = 0
+
         # frames
         self.frame = None
+        # display frame is the undrawn original until first drawn on, then a
+        # copy in one of two buffers, alternated so a frame waiting to be
+        # painted is not drawn over
         self.display_frame = None
         self.orig_frame = None
+        self.draw_bufs = [None, None]
+        self.draw_index = 0
+
+        # regions of the display frame, as (x1, y1, x2, y2): drawn on when
+        # last painted, and replaced since last painted
+        self.drawn_rect = None
+        self.dirty_rect = None
 
-        # frame info
+        # frame info; frame_id changes whenever frame is replaced
+        self.frame_id = 0
         self.frame_num = None
         self.num_frames = None
         self.vid_size = None
+        self.src_fps = None
+        self.frame_stride = 1
         self.display_scale = None
         self.scaled_size = None
+        # interpolation for scaling to display size, None if same size
+        self.resize_interp = cv2.INTER_LINEAR
+        # if true, asks the decoder for the luma plane only, skipping the
+        # conversion to color (frames are then single channel)
+        self.decode_gray = False
 
         # pupil and reflection centers
         self.cx_pupil = None
@@ -48,13 +155,21 @@ class PupilTracker(object):
         self.scaled_cx = None
         self.scaled_cy = None
 
+        # corners of the drawn reflection box, reused each frame
+        self.box_buf = np.empty((4, 1, 2), np.int32)
+
         # param values were set for a 1080p image; this rescales params to whatever the current img size is
         self.param_scale = None
 
         # roi and processing params
         self.noise_kernel = None
-        self.dx = None
-        self.dy = None
+        self.pupil_kernel = None
+        # reused threshold buffers, by 'pupil' or 'refle'
+        self.filter_bufs = {'pupil': None, 'refle': None}
+        # run blur, threshold and noise removal through opencl if available
+        self.use_ocl = hasattr(cv2, 'UMat') and cv2.ocl.useOpenCL()
+        # last processed image, as ((frame id, roi), grayscaled image)
+        self.gray_cache = None
         self.roi_pupil = None
         self.roi_refle = None
         self.roi_size = None
@@ -62,19 +177,32 @@ class PupilTracker(object):
         self.can_pip = None
         self.tracking = True
 
+        # whether steady pupils may be drawn at their predicted center
+        # without searching (see can_coast); off by default, as coasted
+        # frames record predicted rather than measured positions
+        self.coast = False
+        # constant velocity kalman filter of pupil center, and last fit as
+        # (ellipse, scaled ellipse, scaled contour) to redraw when coasting
+        self.kalman = None
+        self.pupil_fit = None
+        self.steady_frames = 0
+        self.coasted_frames = 0
+
         # data to track
         self.data = None
         self.angle = None
         self.angle_data = None
 
-    def init_cap(self, video_file, window_width):
+    def init_cap(self, video_file, window_width, display_fps=None):
         """
         Creates capture object for video
 
         :param video_file: video path
         :param window_width: width of the window
+        :param display_fps: rate at which frames are displayed during playback
         """
         if self.cap is not None:
+            self.stop_reader()
             self.cap.release()
 
         # create capture and get info
@@ -82,53 +210,284 @@ class PupilTracker(object):
             self.cap = cv2.VideoCapture(0)
             self.num_frames = 200
         else:
-            self.cap = cv2.VideoCapture(video_file)
+            self.cap = self.open_video(video_file)
             self.num_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
+        # only keep the latest frame queued to reduce lag on live streams;
+        # not supported by every backend
+        try:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except (AttributeError, cv2.error):
+            pass
+
+        self.set_decode_gray(self.decode_gray)
+
         self.vid_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
                          int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
 
         self.get_set_scaled_size(window_width)
 
+        self.src_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.get_set_frame_stride(display_fps)
+
         # init data holders
         self.data = np.empty((2, self.num_frames, 2))
         self.angle_data = np.empty(self.num_frames)
         self.clear_data()
 
-        # init noise kernel
+        # init noise kernels; closing twice with 3x3 is the same as closing
+        # once with 5x5, in half the passes
         self.noise_kernel = np.ones((3, 3), np.uint8)
+        self.pupil_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
         self.param_scale = self.vid_size[0] / 1920
 
         # load first frame
         self.load_first_frame()
 
+    def open_video(self, video_file):
+        """
+        Opens a video file with ffmpeg, asking for hardware accelerated
+        decoding if this opencv supports it. Falls back to the default
+        backend if that fails.
+
+        :param video_file: video path
+        :return: capture object
+        """
+        # acceleration can only be asked for when opening (opencv >= 4.5.2)
+        if hasattr(cv2, 'CAP_PROP_HW_ACCELERATION'):
+            params = [cv2.CAP_PROP_HW_ACCELERATION,
+                      cv2.VIDEO_ACCELERATION_ANY]
+            try:
+                cap = cv2.VideoCapture(video_file, cv2.CAP_FFMPEG, params)
+                if cap.isOpened():
+                    return cap
+                cap.release()
+            except (TypeError, cv2.error):
+                pass
+
+        return cv2.VideoCapture(video_file)
+
     def release_cap(self):
         """
         Destroys cap object.
         """
         if self.cap is not None:
+            self.stop_reader()
             self.cap.release()
             self.cap = None
         else:
             raise IOError('VideoCapture not created. Nothing to release.')
 
-    def next_frame(self):
+    def read_frame(self, stride=1):
+        """
+        Advances the capture by stride frames, only decoding the last one.
+
+        :param stride: number of frames to advance
+        :return: tuple of the frame and its display frame, or None if at end
+                 of video file
+        """
+        # grab without decoding the frames being skipped
+        for _ in range(stride):
+            if not self.cap.grab():
+                return None
+
+        # next slot in ring; opencv replaces buffers of the wrong size, so
+        # results are stored back into the ring
+        i = self.ring_index = (self.ring_index + 1) % len(self.frame_ring)
+
+        ret, raw = self.cap.retrieve(self.raw_ring[i])
+        if not ret:
+            return None
+        self.raw_ring[i] = raw
+
+        if raw.ndim == 3 and raw.shape[2] == 3:
+            frame = cv2.cvtColor(raw, cv2.COLOR_BGR2RGB,
+                                 dst=self.frame_ring[i])
+            self.frame_ring[i] = frame
+        else:
+            # gray decoding; frame is the luma plane, so is not grayscaled
+            # again when processed
+            frame = self.get_luma(raw)
+
+        display_frame = self.make_display_frame(frame, self.display_ring[i])
+        self.display_ring[i] = display_frame
+
+        return frame, display_frame
+
+    def get_luma(self, frame):
+        """
+        Gets the luma plane from a frame the decoder did not convert to color.
+
+        :param frame: unconverted frame
+        :return: single channel luma frame
+        :raise IOError: if frame layout has no usable luma plane
+        """
+        w, h = self.vid_size
+
+        # gray, or planar yuv (I420, NV12, etc.) with the luma plane first
+        if frame.ndim == 2 and frame.shape[0] >= h and frame.shape[1] == w:
+            return frame[:h]
+
+        # packed yuyv
+        if frame.ndim == 3 and frame.shape[2] == 2:
+            return np.ascontiguousarray(frame[:, :, 0])
+
+        raise IOError('Unsupported frame format for gray decoding.')
+
+    def make_display_frame(self, frame, dst=None):
+        """
+        Scales frame to the display size, as 3 channel color.
+
+        :param frame: frame to display
+        :param dst: buffer to reuse for the display frame, if right size
+        :return: display frame
+        """
+        size = (self.scaled_size[0], self.scaled_size[1])
+        interp = self.resize_interp
+
+        # gray frames are only made color at display size
+        if frame.ndim == 2:
+            if interp is not None:
+                frame = cv2.resize(frame, size, interpolation=interp)
+            return cv2.cvtColor(frame, cv2.COLOR_GRAY2RGB, dst=dst)
+
+        if interp is not None:
+            return cv2.resize(frame, size, dst=dst, interpolation=interp)
+
+        # already display size; still copied, as display frame is drawn on
+        if dst is not None and dst.shape == frame.shape:
+            np.copyto(dst, frame)
+            return dst
+        return frame.copy()
+
+    def set_decode_gray(self, gray):
+        """
+        Sets whether or not frames are decoded to gray only.
+
+        :param gray: true to decode luma only, false for color
+        """
+        was_reading = self.stop_reader()
+
+        self.decode_gray = gray
+        if self.cap is not None:
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0 if gray else 1)
+
+        if was_reading:
+            self.start_reader()
+
+    def start_reader(self):
+        """
+        Starts decoding frames in a background thread, so that the next
+        frames are ready while the current one is being tracked.
+
+        :raise IOError: if no video file loaded
+        """
+        if self.cap is None:
+            raise IOError('No video loaded.')
+
+        if self.reader is not None:
+            return
+
+        self.reader_stop = threading.Event()
+        self.reader = threading.Thread(target=self.reader_loop,
+                                       args=(self.reader_stop,))
+        self.reader.daemon = True
+        self.reader.start()
+
+    def reader_loop(self, stop):
+        """
+        Body of the reader thread. Decodes frames onto the frame queue until
+        told to stop, the video ends, or decoding fails, in which case the
+        error is queued instead. Frames are queued with the number of
+        frames advanced rather than a frame number, so frame_num is only
+        kept by the tracker (which wraps it, see track_pupil).
+
+        :param stop: event signalling the thread to stop
+        """
+        while not stop.is_set():
+            stride = self.frame_stride
+            try:
+                read = self.read_frame(stride)
+            except Exception as e:
+                # handed to the tracker, which raises it in next_frame, so
+                # the thread never dies without queueing something
+                item = e
+            else:
+                item = None if read is None else (stride,) + read
+
+            # queue is bounded, so wait for the tracker to catch up
+            while not stop.is_set():
+                try:
+                    self.frame_queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+            if item is None or isinstance(item, Exception):
+                return
+
+    def stop_reader(self):
+        """
+        Stops the reader thread, dropping frames decoded ahead, and returns
+        the capture to just after the current frame.
+
+        :return: whether or not the reader was running
+        """
+        if self.reader is None:
+            return False
+
+        self.reader_stop.set()
+        self.reader.join()
+        self.reader = None
+
+        while True:
+            try:
+                self.frame_queue.get_nowait()
+            except queue.Empty:
+                break
+
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.frame_num + 1)
+
+        return True
+
+    def next_frame(self, skip=False):
         """
         Gets next frame.
 
+        :param skip: if true, grabs past frames that would not be displayed
+                     (see get_set_frame_stride) without decoding them. Always
+                     true while the reader thread is running.
         :return: next frame
         :raise EOFError: if at end of video file
-        :raise IOError: if no video file loaded
+        :raise IOError: if no video file loaded, or if the reader thread
+                         failed decoding
         """
         if self.cap is not None:
-            ret, self.frame = self.cap.read()
-            if ret:
-                self.frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-                self.display_frame = cv2.resize(self.frame,
-                                                (self.scaled_size[0],
-                                                 self.scaled_size[1]))
-                self.orig_frame = self.display_frame.copy()
-                self.frame_num += 1
+            if self.reader is not None:
+                read = self.frame_queue.get()
+                if isinstance(read, Exception):
+                    # reader failed decoding and has exited
+                    self.stop_reader()
+                    if isinstance(read, IOError):
+                        raise read
+                    raise IOError('Reader stopped: {}'.format(read))
+            else:
+                stride = self.frame_stride if skip else 1
+                read = self.read_frame(stride)
+                if read is not None:
+                    read = (stride,) + read
+
+            if read is not None:
+                stride, self.frame, self.display_frame = read
+                self.frame_num += stride
+                self.frame_id += 1
+
+                # window may have been resized since frame was decoded
+                if self.display_frame.shape[1] != self.scaled_size[0]:
+                    self.display_frame = self.make_display_frame(self.frame)
+
+                self.orig_frame = self.display_frame
+                self.mark_all_dirty()
             else:
                 # at end; clear locations and return to first frame
                 self.roi_pupil = None
@@ -151,19 +510,110 @@ class PupilTracker(object):
             raise EOFError('Already at beginning')
 
         if self.cap is not None:
+            was_reading = self.stop_reader()
+
             self.frame_num -= 1
             self.cap.set(cv2.CAP_PROP_POS_FRAMES,
                          self.frame_num)
-            ret, self.frame = self.cap.read()
-            if ret:
-                self.frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-                self.display_frame = cv2.resize(self.frame,
-                                                (self.scaled_size[0],
-                                                 self.scaled_size[1]))
-                self.orig_frame = self.display_frame.copy()
+            self.reset_kalman()
+            read = self.read_frame()
+            if read is not None:
+                self.frame, self.display_frame = read
+                self.frame_id += 1
+                self.orig_frame = self.display_frame
+                self.mark_all_dirty()
+
+            if was_reading:
+                self.start_reader()
         else:
             raise IOError('No video loaded.')
 
+    def get_drawable_frame(self):
+        """
+        Gets the display frame ready to draw on, first copying it from the
+        original if not yet drawn on since the last new frame or clear.
+
+        :return: display frame to draw on
+        """
+        if self.display_frame is self.orig_frame:
+            self.draw_index ^= 1
+            buf = self.draw_bufs[self.draw_index]
+            if buf is not None and buf.shape == self.orig_frame.shape:
+                np.copyto(buf, self.orig_frame)
+            else:
+                buf = self.orig_frame.copy()
+                self.draw_bufs[self.draw_index] = buf
+            self.display_frame = buf
+
+        return self.display_frame
+
+    def dirty_bbox(self):
+        """
+        Gets the region of the display frame that differs from the original
+        frame, i.e. that has been drawn on.
+
+        :return: drawn region as (x1, y1, x2, y2), or None if nothing drawn
+        """
+        if self.orig_frame is None or self.display_frame is self.orig_frame \
+                or self.orig_frame.shape != self.display_frame.shape:
+            return None
+
+        # rows and columns holding any changed pixel
+        changed = np.any(self.display_frame != self.orig_frame, axis=2)
+        rows = np.flatnonzero(changed.any(axis=1))
+        if not rows.size:
+            return None
+        cols = np.flatnonzero(changed.any(axis=0))
+
+        return (int(cols[0]), int(rows[0]),
+                int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+    def mark_all_dirty(self):
+        """
+        Marks the whole display frame as changed, e.g. for a new frame.
+        """
+        h, w = self.display_frame.shape[:2]
+        self.dirty_rect = (0, 0, w, h)
+
+    def union_rects(self, rect1, rect2):
+        """
+        Gets the smallest rect holding both rects. Either may be None.
+
+        :param rect1: rect as (x1, y1, x2, y2)
+        :param rect2: rect as (x1, y1, x2, y2)
+        :return: union of rects
+        """
+        if rect1 is None:
+            return rect2
+        if rect2 is None:
+            return rect1
+
+        return (min(rect1[0], rect2[0]), min(rect1[1], rect2[1]),
+                max(rect1[2], rect2[2]), max(rect1[3], rect2[3]))
+
+    def pop_dirty_rect(self):
+        """
+        Gets the region of the display frame changed since last call.
+
+        :return: changed region as (x, y, width, height), or None if nothing
+                 changed
+        """
+        h, w = self.display_frame.shape[:2]
+        if self.dirty_rect == (0, 0, w, h):
+            # whole frame repainted anyway, so skip comparing
+            rect = self.dirty_rect
+            self.drawn_rect = rect
+        else:
+            # both old and new drawings need repainting
+            drawn = self.dirty_bbox()
+            rect = self.union_rects(self.dirty_rect,
+                                    self.union_rects(self.drawn_rect, drawn))
+            self.drawn_rect = drawn
+        self.dirty_rect = None
+
+        if rect is not None:
+            return rect[0], rect[1], rect[2] - rect[0], rect[3] - rect[1]
+
     def get_frame(self):
         """
         Gets the current display frame.
@@ -179,7 +629,9 @@ class PupilTracker(object):
         """
         # seek to first frame
         if self.cap is not None:
+            self.stop_reader()
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.reset_kalman()
 
             self.frame_num = -1
 
@@ -251,17 +703,45 @@ class PupilTracker(object):
 
             self.display_scale = self.vid_size[0] / width
 
+            # no resize needed at same size, and shrinking by a whole factor
+            # has a fast path with INTER_AREA
+            vid_w, vid_h = self.vid_size
+            w, h = self.scaled_size
+            if (w, h) == (vid_w, vid_h):
+                self.resize_interp = None
+            elif vid_w % w == 0 and vid_h % h == 0 \
+                    and vid_w // w == vid_h // h:
+                self.resize_interp = cv2.INTER_AREA
+            else:
+                self.resize_interp = cv2.INTER_LINEAR
+
         return self.scaled_size
 
+    def get_set_frame_stride(self, display_fps):
+        """
+        Tracks how many source frames pass per displayed frame, so that
+        frames which would never be shown are not decoded.
+
+        :param display_fps: display rate, or None to show every frame
+        :return: frame stride
+        """
+        if display_fps and self.src_fps and self.src_fps > 0:
+            self.frame_stride = max(1, int(round(self.src_fps / display_fps)))
+        else:
+            self.frame_stride = 1
+
+        return self.frame_stride
+
     def on_size(self):
         """
         Resizes frame on size events.
         """
         if self.display_frame is not None:
-            self.orig_frame = cv2.resize(self.frame,
-                                         (self.scaled_size[0],
-                                             self.scaled_size[1]))
-            self.display_frame = self.orig_frame.copy()
+            self.orig_frame = self.make_display_frame(self.frame)
+            self.display_frame = self.orig_frame
+            self.mark_all_dirty()
+            # cached drawing is at old scale
+            self.reset_kalman()
 
         else:
             raise IOError('No video selected.')
@@ -271,7 +751,8 @@ class PupilTracker(object):
         Clears frame of drawings.
         """
         if self.orig_frame is not None:
-            self.display_frame = self.orig_frame.copy()
+            # copied again when next drawn on
+            self.display_frame = self.orig_frame
         else:
             raise IOError('Nothing here.')
 
@@ -281,6 +762,7 @@ class PupilTracker(object):
         """
         self.roi_pupil = None
         self.roi_refle = None
+        self.reset_kalman()
 
     def clear_data(self):
         """
@@ -318,31 +800,106 @@ class PupilTracker(object):
 
     def process_image(self, img, roi=None):
         """
-        Blurs, grayscales, and ROIs either entire frame or only certain
-        region.
+        Grayscales, blurs, and ROIs either entire frame or only certain
+        region. Grayscaling first means the blur only runs on one channel.
+        The result for the current frame is cached, so repeated calls with
+        the same roi (e.g. while dragging a threshold slider) are free.
 
         :param img: frame being processed
         :param roi: region of interest being processed
         :return: grayscaled, blurred, ROIed frame
         """
+        key = (self.frame_id, None if roi is None else tuple(roi))
+        cached = self.gray_cache
+        if img is self.frame and cached is not None and cached[0] == key:
+            return cached[1]
+
         if roi is not None:
             # roi
-            self.dx = roi[0][0]
-            self.dy = roi[0][1]
             roi_image = img[roi[0][1]:roi[1][1],
                             roi[0][0]:roi[1][0]]
-            # gaussian filter
-            gauss = cv2.GaussianBlur(roi_image, (5, 5), 0)
 
         else:
-            self.dx = 0
-            self.dy = 0
-            # gaussian filter
-            gauss = cv2.GaussianBlur(img, (5, 5), 0)
+            roi_image = img
+
+        # make grayscale, unless already gray
+        if roi_image.ndim == 3:
+            gray = cv2.cvtColor(roi_image, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = roi_image
+        # gaussian filter, through opencl if available
+        gauss = None
+        if self.use_ocl:
+            try:
+                gauss = cv2.GaussianBlur(cv2.UMat(gray), (5, 5), 0)
+            except cv2.error:
+                self.disable_ocl()
+        if gauss is None:
+            gauss = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        # replaced in one go, so safe when searching from several threads
+        if img is self.frame:
+            self.gray_cache = (key, gauss)
+
+        return gauss
+
+    def is_umat(self, img):
+        """
+        Checks whether an image is an opencl UMat.
 
-        # make grayscale
-        gray = cv2.cvtColor(gauss, cv2.COLOR_BGR2GRAY)
-        return gray
+        :param img: image to check
+        :return: true if UMat
+        """
+        return hasattr(cv2, 'UMat') and isinstance(img, cv2.UMat)
+
+    def disable_ocl(self):
+        """
+        Falls back to processing with numpy, e.g. when an opencl call fails.
+        """
+        self.use_ocl = False
+        self.gray_cache = None
+
+    def filter_image(self, grayed, which):
+        """
+        Thresholds a processed image and removes noise. Works in place in a
+        buffer kept for each of pupil and reflection, so is overwritten by the
+        next call for the same one.
+
+        :param grayed: processed image
+        :param which: whether to filter for pupil or reflection
+        :return: filtered binary image
+        """
+        if which == 'pupil':
+            thresh = self.app.pupil_thresh
+            kernel = self.pupil_kernel
+        elif which == 'refle':
+            thresh = self.app.refle_thresh
+            kernel = self.noise_kernel
+        else:
+            raise AttributeError('Wrong parameter.')
+
+        if self.is_umat(grayed):
+            if self.use_ocl:
+                try:
+                    _, threshed = cv2.threshold(grayed, thresh, 255,
+                                                cv2.THRESH_BINARY)
+                    filtered = cv2.morphologyEx(threshed, cv2.MORPH_CLOSE,
+                                                kernel)
+                    # only download result; contours are found on the cpu
+                    return filtered.get()
+                except cv2.error:
+                    self.disable_ocl()
+
+            grayed = grayed.get()
+
+        # opencv replaces buffer if roi size changed
+        _, threshed = cv2.threshold(grayed, thresh, 255, cv2.THRESH_BINARY,
+                                    dst=self.filter_bufs[which])
+        filtered = cv2.morphologyEx(threshed, cv2.MORPH_CLOSE, kernel,
+                                    dst=threshed)
+        self.filter_bufs[which] = filtered
+
+        return filtered
 
     def get_filtered(self, which):
         """
@@ -353,18 +910,7 @@ class PupilTracker(object):
         """
         grayed = self.process_image(self.frame)
 
-        if which == 'pupil':
-            _, threshed = cv2.threshold(grayed, self.app.pupil_thresh, 255,
-                                        cv2.THRESH_BINARY)
-            filtered = cv2.morphologyEx(threshed, cv2.MORPH_CLOSE,
-                                        self.noise_kernel, iterations=2)
-        elif which == 'refle':
-            _, threshed = cv2.threshold(grayed, self.app.refle_thresh, 255,
-                                        cv2.THRESH_BINARY)
-            filtered = cv2.morphologyEx(threshed, cv2.MORPH_CLOSE,
-                                        self.noise_kernel, iterations=1)
-        else:
-            raise AttributeError('Wrong parameter.')
+        filtered = self.filter_image(grayed, which)
 
         scaled_filtered = cv2.resize(filtered,
                                      (self.scaled_size[0],
@@ -386,74 +932,135 @@ class PupilTracker(object):
 
         return blended
 
+    def drop_small_contours(self, contours, min_area):
+        """
+        Drops contours whose bounding box is no larger than min_area. A
+        contour's area is always less than its bounding box's, so these would
+        be dropped anyway; this just saves the slower checks in find_pupils
+        and find_refle for the many small noise contours.
+
+        :param contours: list of contours
+        :param min_area: smallest contour area wanted
+        :return: list of remaining contours
+        """
+        if len(contours) == 0:
+            return contours
+
+        boxes = np.array([cv2.boundingRect(cnt) for cnt in contours])
+        keep = boxes[:, 2] * boxes[:, 3] > min_area
+
+        return [cnt for cnt, k in zip(contours, keep) if k]
+
     def find_pupils(self, roi=None):
         """
         Searches for possible pupils in processed image
 
         :param roi: region of interest
-        :return: list of possible pupil contours
+        :return: list of possible pupil contours, most circular first
         """
         # roi and gauss
         grayed = self.process_image(self.frame, roi)
+        # offset of roi in full image
+        dx, dy = roi[0] if roi is not None else (0, 0)
         # threshold and remove noise
-        _, thresh_pupil = cv2.threshold(grayed, self.app.pupil_thresh, 255,
-                                        cv2.THRESH_BINARY)
-        filtered_pupil = cv2.morphologyEx(thresh_pupil, cv2.MORPH_CLOSE,
-                                          self.noise_kernel, iterations=2)
+        filtered_pupil = self.filter_image(grayed, 'pupil')
 
         # cv2.imshow('filtered_pupil', filtered_pupil.copy())
         # find contours
         _, contours_pupil, _ = cv2.findContours(filtered_pupil, cv2.RETR_TREE,
                                                 cv2.CHAIN_APPROX_SIMPLE)
 
+        # area bounds
+        area_lo = self.param_scale * 2000
+        if self.roi_size is None:
+            area_hi = self.param_scale * 120000
+        else:
+            area_hi = self.roi_size**2
+
+        contours_pupil = self.drop_small_contours(contours_pupil, area_lo)
+
         found_pupils = []
         # process contours
         if len(contours_pupil) != 0:
-            for cnt in contours_pupil:
+            areas = np.array([cv2.contourArea(cnt) for cnt in contours_pupil])
 
-                # drop small and large
-                area = cv2.contourArea(cnt)
-                if area == 0:
-                    # print('pupil area zero', self.frame_num)
-                    continue
+            # remove concavities
+            hulls = [cv2.convexHull(cnt) for cnt in contours_pupil]
+            hull_sizes = np.array([hull.shape[0] for hull in hulls])
+            circumferences = np.array([cv2.arcLength(hull, True)
+                                       for hull in hulls])
 
-                if self.roi_size is None:
-                    if not 2000 < area / self.param_scale < 120000:
-                        # print('pupil too small/large', self.frame_num,
-                        #       int(area / self.param_scale))
-                        continue
-                else:
-                    if not self.param_scale * 2000 < area < self.roi_size**2:
-                        continue
+            keep = filter_pupils(areas, hull_sizes, circumferences,
+                                 float(area_lo), float(area_hi))
 
-                # remove concavities, drop too few points
-                hull = cv2.convexHull(cnt)
-                if hull.shape[0] < 5:
-                    # print('too few points', self.frame_num)
-                    continue
-
-                # drop too eccentric
-                circumference = cv2.arcLength(hull, True)
-                circularity = circumference ** 2 / (4*np.pi*area)
-                if circularity >= 1.6:
-                    # print('not circle', self.frame_num)
-                    continue
+            # most circular first, so that the likeliest pupil is selected
+            # by default and small changes in processing cannot reorder it
+            kept = np.flatnonzero(keep)
+            order = np.argsort(circumferences[kept]**2 / areas[kept],
+                               kind='mergesort')
 
+            for i in kept[order]:
+                hull = hulls[i]
                 # rescale to full image
-                hull[:, :, 0] += self.dx
-                hull[:, :, 1] += self.dy
+                hull[:, :, 0] += dx
+                hull[:, :, 1] += dy
 
                 found_pupils.append(hull)
 
         return found_pupils
 
-    def draw_pupil(self, index=None, roi=None, verbose=True):
+    def draw_cross(self, img, cx, cy, color):
+        """
+        Draws a 5 pixel crosshair by writing directly to the image, which is
+        much cheaper than cv2.line for something this small. Clipped to the
+        image like cv2.line.
+
+        :param img: image to draw on
+        :param cx: x coordinate of center
+        :param cy: y coordinate of center
+        :param color: color of crosshair
+        """
+        h, w = img.shape[:2]
+
+        if 0 <= cy < h:
+            img[cy, max(cx-2, 0):max(cx+3, 0)] = color
+        if 0 <= cx < w:
+            img[max(cy-2, 0):max(cy+3, 0), cx] = color
+
+    def draw_rect(self, img, pt1, pt2, color):
+        """
+        Draws a 1 pixel rectangle outline by writing its edges directly to
+        the image. Same result as cv2.rectangle, including clipping.
+
+        :param img: image to draw on
+        :param pt1: upper left corner
+        :param pt2: lower right corner
+        :param color: color of rectangle
+        """
+        h, w = img.shape[:2]
+        x1, x2 = sorted((pt1[0], pt2[0]))
+        y1, y2 = sorted((pt1[1], pt2[1]))
+
+        # edges, clipped to image
+        cols = slice(max(x1, 0), max(x2+1, 0))
+        rows = slice(max(y1, 0), max(y2+1, 0))
+
+        for y in (y1, y2):
+            if 0 <= y < h:
+                img[y, cols] = color
+        for x in (x1, x2):
+            if 0 <= x < w:
+                img[rows, x] = color
+
+    def draw_pupil(self, index=None, roi=None, verbose=True, cnt_list=None):
         """
         Draws the currently selected pupil to the frame.
 
         :param index: which pupil in the list of possible pupils to draw
         :param roi: region of interest
         :param verbose: if true, draws extra content to the frame (roi, etc)
+        :param cnt_list: possible pupils if already searched for, otherwise
+                         searches roi
 
         :raise AttributeError: if list of pupils is empty
         """
@@ -471,7 +1078,8 @@ class PupilTracker(object):
             self.roi_size = None
 
         # get list of pupil contours
-        cnt_list = self.find_pupils(roi)
+        if cnt_list is None:
+            cnt_list = self.find_pupils(roi)
 
         if len(cnt_list) > 0:
             cnt = cnt_list[index]
@@ -499,19 +1107,15 @@ class PupilTracker(object):
         self.scaled_cy = scaled_cy
 
         # draw scaled
-        cv2.line(self.display_frame,
-                 (scaled_cx-2, scaled_cy),
-                 (scaled_cx+2, scaled_cy),
-                 (255, 255, 255), 1)
-        cv2.line(self.display_frame,
-                 (scaled_cx, scaled_cy-2),
-                 (scaled_cx, scaled_cy+2),
-                 (255, 255, 255), 1)
+        self.get_drawable_frame()
+        self.draw_cross(self.display_frame, scaled_cx, scaled_cy,
+                        (255, 255, 255))
 
         scaled_cnt = np.rint(cnt / self.display_scale)
         scaled_cnt = scaled_cnt.astype(int)
         scaled_ellipse = cv2.fitEllipse(scaled_cnt)
         cv2.ellipse(self.display_frame, scaled_ellipse, (0, 255, 100), 1)
+        self.pupil_fit = (ellipse, scaled_ellipse, scaled_cnt)
 
         if self.roi_size is None:
             self.roi_size = int(np.rint(max(ellipse[1][0], ellipse[1][1]) *
@@ -522,15 +1126,22 @@ class PupilTracker(object):
         if verbose:
             cv2.drawContours(self.display_frame, scaled_cnt, -1, (255, 255,
                                                                   255), 2)
-            cv2.rectangle(self.display_frame,
-                          (scaled_cx - self.scaled_roi_size, scaled_cy - self.scaled_roi_size),
-                          (scaled_cx + self.scaled_roi_size, scaled_cy + self.scaled_roi_size),
-                          (255, 255, 255))
+            self.draw_rect(self.display_frame,
+                           (scaled_cx - self.scaled_roi_size, scaled_cy - self.scaled_roi_size),
+                           (scaled_cx + self.scaled_roi_size, scaled_cy + self.scaled_roi_size),
+                           (255, 255, 255))
             # box = cv2.boxPoints(ellipse)
             # box = np.int0(box)
             # cv2.drawContours(self.display_frame, [box], 0,(0,0,255),1)
 
-        # correct out of bounds roi
+        self.move_roi_pupil()
+
+        self.tracking = False
+
+    def move_roi_pupil(self):
+        """
+        Centers the pupil roi on the pupil, correcting if out of bounds.
+        """
         roi_lu_x = self.cx_pupil - self.roi_size
         roi_lu_y = self.cy_pupil - self.roi_size
         roi_rl_x = self.cx_pupil + self.roi_size
@@ -543,27 +1154,135 @@ class PupilTracker(object):
         self.roi_pupil = [(roi_lu_x, roi_lu_y),
                           (roi_rl_x, roi_rl_y)]
 
-        self.tracking = False
+    def set_coast(self, coast):
+        """
+        Sets whether or not steady pupils are coasted. Coasted frames record
+        the predicted center and no angle (NaN).
+
+        :param coast: true to coast steady pupils
+        """
+        self.coast = coast
+        self.reset_kalman()
+
+    def reset_kalman(self):
+        """
+        Forgets the pupil's motion, e.g. after seeking or losing it, so the
+        next frames are measured.
+        """
+        self.kalman = None
+        self.pupil_fit = None
+        self.steady_frames = 0
+        self.coasted_frames = 0
 
-    def track_pupil(self, verbose=True):
+    def update_kalman(self):
+        """
+        Feeds the measured pupil center to the kalman filter, counting how
+        many frames in a row it was where predicted.
+        """
+        measured = np.array([[self.cx_pupil], [self.cy_pupil]], np.float32)
+
+        if self.kalman is None:
+            # constant velocity model of (x, y, vx, vy)
+            kf = cv2.KalmanFilter(4, 2)
+            kf.transitionMatrix = np.array([[1, 0, 1, 0],
+                                            [0, 1, 0, 1],
+                                            [0, 0, 1, 0],
+                                            [0, 0, 0, 1]], np.float32)
+            kf.measurementMatrix = np.eye(2, 4, dtype=np.float32)
+            kf.processNoiseCov = np.eye(4, dtype=np.float32) * 1e-2
+            kf.measurementNoiseCov = np.eye(2, dtype=np.float32) * 1e-1
+            kf.errorCovPost = np.eye(4, dtype=np.float32)
+            kf.statePost = np.array([[self.cx_pupil], [self.cy_pupil],
+                                     [0], [0]], np.float32)
+            self.kalman = kf
+            self.steady_frames = 0
+        else:
+            predicted = self.kalman.predict()[:2]
+            self.kalman.correct(measured)
+            if np.hypot(*(measured - predicted).ravel()) < STEADY_INNOVATION:
+                self.steady_frames += 1
+            else:
+                self.steady_frames = 0
+
+        self.coasted_frames = 0
+
+    def can_coast(self):
+        """
+        Checks whether the pupil has been steady long enough to be drawn at
+        its predicted center instead of searched for.
+
+        :return: true if next frame can skip searching for pupil
+        """
+        return (self.coast and self.tracking and
+                self.pupil_fit is not None and
+                self.steady_frames >= STEADY_FRAMES and
+                self.coasted_frames < MAX_COAST_FRAMES)
+
+    def coast_pupil(self, verbose=True):
+        """
+        Draws the last fit pupil moved to the kalman predicted center,
+        without searching for it.
+
+        :param verbose: if true, draws extra content to the frame (roi, etc)
+        """
+        predicted = self.kalman.predict()
+        ellipse, scaled_ellipse, scaled_cnt = self.pupil_fit
+
+        self.cx_pupil = int(np.rint(predicted[0, 0]))
+        self.cy_pupil = int(np.rint(predicted[1, 0]))
+
+        # shift of center since last fit, in display pixels
+        shift_x = (predicted[0, 0] - ellipse[0][0]) / self.display_scale
+        shift_y = (predicted[1, 0] - ellipse[0][1]) / self.display_scale
+
+        scaled_cx = int(self.cx_pupil / self.display_scale)
+        scaled_cy = int(self.cy_pupil / self.display_scale)
+        self.scaled_cx = scaled_cx
+        self.scaled_cy = scaled_cy
+
+        self.get_drawable_frame()
+        self.draw_cross(self.display_frame, scaled_cx, scaled_cy,
+                        (255, 255, 255))
+        (ex, ey), axes, angle = scaled_ellipse
+        cv2.ellipse(self.display_frame,
+                    ((ex + shift_x, ey + shift_y), axes, angle),
+                    (0, 255, 100), 1)
+
+        if verbose:
+            shift = np.array([int(np.rint(shift_x)), int(np.rint(shift_y))])
+            cv2.drawContours(self.display_frame, scaled_cnt + shift, -1,
+                             (255, 255, 255), 2)
+            self.draw_rect(self.display_frame,
+                           (scaled_cx - self.scaled_roi_size, scaled_cy - self.scaled_roi_size),
+                           (scaled_cx + self.scaled_roi_size, scaled_cy + self.scaled_roi_size),
+                           (255, 255, 255))
+
+        self.move_roi_pupil()
+        self.coasted_frames += 1
+
+    def track_pupil(self, verbose=True, cnt_list=None):
         """
         Makes call to draw pupil with proper roi and handles errors.
 
         :param verbose: whether or not to draw extra
+        :param cnt_list: possible pupils if already searched for
         """
         if self.roi_pupil is not None:
+            coasted = self.can_coast()
+            # angle is not measured when coasting
+            no_angle = np.nan
+
             try:
-                self.draw_pupil(roi='pupil', verbose=verbose)
-                try:
-                    self.data[0][self.frame_num] = [self.cx_pupil, self.cy_pupil]
-                    self.angle_data[self.frame_num] = self.angle
-                except IndexError:
-                    self.frame_num = 0
-                    self.track_pupil(verbose)
-                self.can_pip = True
-                self.tracking = True
-                # TODO: make tracking tracker
-                # bc when loses roi then resets shape because can't pip...
+                if coasted:
+                    self.coast_pupil(verbose)
+                else:
+                    # not yet tracking means pupil was just (re)selected
+                    if not self.tracking:
+                        self.reset_kalman()
+                    self.draw_pupil(roi='pupil', verbose=verbose,
+                                    cnt_list=cnt_list)
+                    if self.coast:
+                        self.update_kalman()
 
             # except IndexError as e:
             #     # print(e)
@@ -573,6 +1292,20 @@ class PupilTracker(object):
             except AttributeError:
                 # print(e)
                 self.can_pip = False
+                self.reset_kalman()
+                return
+
+            try:
+                self.data[0][self.frame_num] = [self.cx_pupil, self.cy_pupil]
+                self.angle_data[self.frame_num] = \
+                    no_angle if coasted else self.angle
+            except IndexError:
+                self.frame_num = 0
+                self.track_pupil(verbose, cnt_list)
+            self.can_pip = True
+            self.tracking = True
+            # TODO: make tracking tracker
+            # bc when loses roi then resets shape because can't pip...
         else:
             pass
 
@@ -585,66 +1318,61 @@ class PupilTracker(object):
         """
         # roi and gauss
         grayed = self.process_image(self.frame, roi)
+        # offset of roi in full image
+        dx, dy = roi[0] if roi is not None else (0, 0)
         # threshold and remove noise
-        _, thresh_refle = cv2.threshold(grayed, self.app.refle_thresh, 255,
-                                        cv2.THRESH_BINARY)
-        filtered_refle = cv2.morphologyEx(thresh_refle, cv2.MORPH_CLOSE,
-                                          self.noise_kernel, iterations=1)
+        filtered_refle = self.filter_image(grayed, 'refle')
 
         # cv2.imshow('filtered_refle', filtered_refle.copy())
         # find contours
         _, contours_refle, _ = cv2.findContours(filtered_refle, cv2.RETR_TREE,
                                                 cv2.CHAIN_APPROX_SIMPLE)
 
+        # area bounds
+        area_lo = self.param_scale * 80
+        area_hi = self.param_scale * 8000
+
+        contours_refle = self.drop_small_contours(contours_refle, area_lo)
+
         found_reflections = []
         # process contours
         if len(contours_refle) != 0:
-            for cnt in contours_refle:
-
-                # drop small and large
-                area = cv2.contourArea(cnt)
-                if area == 0:
-                    # print('refle area zero', self.frame_num)
-                    continue
-
-                if not 80 < area / self.param_scale < 8000:
-                    # print('refle too small/large', self.frame_num, int(area / self.param_scale))
-                    continue
+            areas = np.array([cv2.contourArea(cnt) for cnt in contours_refle])
 
-                # rescale to full image
-                cnt[:, :, 0] += self.dx
-                cnt[:, :, 1] += self.dy
-
-                # test squareness
-                rect = cv2.minAreaRect(cnt)
-                w, h = rect[1][0], rect[1][1]
-                squareness = h / w
-                if not 0.5 < squareness < 2:
-                    # print('refle not square', self.frame_num)
-                    continue
+            # rescale to full image
+            for cnt in contours_refle:
+                cnt[:, :, 0] += dx
+                cnt[:, :, 1] += dy
+
+            rects = [cv2.minAreaRect(cnt) for cnt in contours_refle]
+            sizes = np.array([rect[1] for rect in rects], np.float64)
+            # rect centers, truncated like int()
+            centers = np.array([rect[0] for rect in rects]).astype(np.int64)
+
+            # only test center if roi given
+            if roi is not None:
+                bounds = np.array([roi[0][0], roi[0][1], roi[1][0], roi[1][1]],
+                                  np.float64)
+            else:
+                bounds = np.array([-np.inf, -np.inf, np.inf, np.inf])
 
-                # see if center in roi
-                if roi is not None:
-                    # rect center
-                    cx = int(rect[0][0])
-                    cy = int(rect[0][1])
-                    if not roi[0][0] < cx < roi[1][0] \
-                            or not \
-                            roi[0][1] < cy < roi[1][1]:
-                        # print('refle not in roi', self.frame_num)
-                        continue
+            keep = filter_refle(areas, sizes, centers,
+                                float(area_lo), float(area_hi), bounds)
 
-                found_reflections.append(cnt)
+            found_reflections = [cnt for cnt, k in zip(contours_refle, keep)
+                                 if k]
 
         return found_reflections
 
-    def draw_refle(self, index=None, roi=None, verbose=True):
+    def draw_refle(self, index=None, roi=None, verbose=True, cnt_list=None):
         """
         Draws the currently selected reflection to the frame.
 
         :param index: which pupil in the list of possible reflections to draw
         :param roi: region of interest
         :param verbose: if true, draws extra content to the frame (roi, etc)
+        :param cnt_list: possible reflections if already searched for,
+                         otherwise searches roi
         :raise AttributeError: if list of reflections is empty
         """
         # if no index passed, means we are tracking single reflection
@@ -658,7 +1386,8 @@ class PupilTracker(object):
             roi = self.roi_refle
 
         # get list of reflection contours
-        cnt_list = self.find_refle(roi)
+        if cnt_list is None:
+            cnt_list = self.find_refle(roi)
 
         if len(cnt_list) > 0:
             cnt = cnt_list[index]
@@ -683,39 +1412,37 @@ class PupilTracker(object):
         scaled_cy = int(self.cy_refle / self.display_scale)
 
         # draw
-        cv2.line(self.display_frame,
-                 (scaled_cx-2, scaled_cy),
-                 (scaled_cx+2, scaled_cy),
-                 (0, 0, 0), 1)
-        cv2.line(self.display_frame,
-                 (scaled_cx, scaled_cy-2),
-                 (scaled_cx, scaled_cy+2),
-                 (0, 0, 0), 1)
+        self.get_drawable_frame()
+        self.draw_cross(self.display_frame, scaled_cx, scaled_cy, (0, 0, 0))
 
         scaled_cnt = np.rint(cnt / self.display_scale)
         scaled_cnt = scaled_cnt.astype(int)
         scaled_rect = cv2.minAreaRect(scaled_cnt)
-        box = cv2.boxPoints(scaled_rect)
-        box = np.int0(box)
-        cv2.drawContours(self.display_frame, [box], 0, (0, 255, 100), 1)
+        # truncate corners to int, like np.int0, without new arrays
+        np.copyto(self.box_buf[:, 0, :], cv2.boxPoints(scaled_rect),
+                  casting='unsafe')
+        cv2.drawContours(self.display_frame, [self.box_buf], 0,
+                         (0, 255, 100), 1)
 
         # draw extra
         if verbose:
-            cv2.rectangle(self.display_frame,
-                          (scaled_cx - scaled_roi_size, scaled_cy - scaled_roi_size),
-                          (scaled_cx + scaled_roi_size, scaled_cy + scaled_roi_size),
-                          (255, 255, 255))
+            self.draw_rect(self.display_frame,
+                           (scaled_cx - scaled_roi_size, scaled_cy - scaled_roi_size),
+                           (scaled_cx + scaled_roi_size, scaled_cy + scaled_roi_size),
+                           (255, 255, 255))
             cv2.drawContours(self.display_frame, scaled_cnt, -1, (0, 0, 255), 2)
 
-    def track_refle(self, verbose=True):
+    def track_refle(self, verbose=True, cnt_list=None):
         """
         Makes call to draw reflection with proper roi and handles errors.
 
         :param verbose: whether or not to draw extra
+        :param cnt_list: possible reflections if already searched for
         """
         if self.roi_refle is not None:
             try:
-                self.draw_refle(roi='refle', verbose=verbose)
+                self.draw_refle(roi='refle', verbose=verbose,
+                                cnt_list=cnt_list)
                 self.data[1][self.frame_num] = [self.cx_refle, self.cy_refle]
 
             # except IndexError as e:
@@ -729,6 +1456,36 @@ class PupilTracker(object):
         else:
             pass
 
+    def find_tracked(self, pool):
+        """
+        Searches for the tracked pupil and reflection at the same time, in a
+        thread pool. The two only read the frame, and opencv releases the
+        gil, so the searches overlap. Drawing is left to track_pupil and
+        track_refle, on the calling thread.
+
+        :param pool: thread pool to search in
+        :return: tuple of possible pupils and possible reflections, None for
+                 either not being tracked
+        """
+        # as in draw_pupil, pupil size is unknown until tracking
+        if not self.tracking:
+            self.roi_size = None
+
+        pupils = None
+        refle = None
+        # no need to search for a pupil that will be coasted
+        if self.roi_pupil is not None and not self.can_coast():
+            pupils = pool.apply_async(self.find_pupils, (self.roi_pupil,))
+        if self.roi_refle is not None:
+            refle = pool.apply_async(self.find_refle, (self.roi_refle,))
+
+        if pupils is not None:
+            pupils = pupils.get()
+        if refle is not None:
+            refle = refle.get()
+
+        return pupils, refle
+
     def pip(self):
         """
         Creates picture in picture of pupil ROI
@@ -746,6 +1503,7 @@ class PupilTracker(object):
                 if element < 0:
                     coords[ind] = 0
 
+            self.get_drawable_frame()
             roi_image = self.display_frame[
                         coords[2]:coords[3],
                         coords[0]:coords[1]]
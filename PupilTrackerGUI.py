@@ -13,7 +13,13 @@ import wxmplot  # wx matplotlib library
 import numpy as np
 from os import path
 from sys import platform
+from multiprocessing.pool import ThreadPool
 from PupilTracker import PupilTracker
+
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue
 # from psychopy.core import MonotonicClock  # for getting display fps
 
 
@@ -34,6 +40,8 @@ class ImagePanel(wx.Panel):
         self.app = parent
         self.image_bmp = None
         self.orig_image = None
+        # frames waiting to be copied to the bitmap on the next paint
+        self.paint_queue = queue.Queue(maxsize=2)
         # self.t = None
 
         self.SetDoubleBuffered(True)
@@ -70,9 +78,36 @@ class ImagePanel(wx.Panel):
         """
         h = img.shape[0]
         w = img.shape[1]
+        self.clear_paint_queue()
         self.image_bmp = wx.BitmapFromBuffer(w, h, img)
         self.Refresh()  # causes paint
 
+    def queue_paint(self, img):
+        """
+        Queues a frame to be copied to the bitmap on the next paint. If
+        painting has fallen behind, the oldest queued frame is dropped.
+
+        :param img: frame to paint
+        """
+        try:
+            self.paint_queue.put_nowait(img)
+        except queue.Full:
+            self.paint_queue.get_nowait()
+            self.paint_queue.put_nowait(img)
+
+    def clear_paint_queue(self):
+        """
+        Drops frames waiting to be painted, for when the bitmap is replaced.
+
+        :return: the most recently queued frame, or None if queue was empty
+        """
+        img = None
+        while True:
+            try:
+                img = self.paint_queue.get_nowait()
+            except queue.Empty:
+                return img
+
     def draw(self, evt=None, img=None, step=False, direction='forward'):
         """
         Draws frame passed from tracking class.
@@ -82,7 +117,8 @@ class ImagePanel(wx.Panel):
         if self.app.playing or step:
             try:
                 if direction == 'forward':
-                    self.app.next_frame()
+                    # only skip undisplayed frames when playing, not stepping
+                    self.app.next_frame(skip=not step)
                 elif direction == 'backward':
                     try:
                         self.app.prev_frame()
@@ -110,8 +146,7 @@ class ImagePanel(wx.Panel):
                 self.stop_timer()
                 return
 
-            self.app.track_pupil()
-            self.app.track_refle()
+            self.app.track()
             if self.app.to_pip:
                 self.app.pip()
             try:
@@ -124,12 +159,19 @@ class ImagePanel(wx.Panel):
 
         if img is None:
             if self.image_bmp is not None:
-                self.image_bmp.CopyFromBuffer(self.app.get_frame())
+                self.queue_paint(self.app.get_frame())
             else:
                 raise AttributeError('Nothing here.')
+
+            # only repaint what changed since last draw
+            dirty = self.app.tracker.pop_dirty_rect()
+            if dirty is not None:
+                self.RefreshRect(wx.Rect(*dirty))  # causes paint
         else:
-            self.image_bmp.CopyFromBuffer(img)
-        self.Refresh()  # causes paint
+            self.queue_paint(img)
+            # passed image replaces whole frame, so all of it is stale after
+            self.app.tracker.mark_all_dirty()
+            self.Refresh()  # causes paint
 
         # TODO: fix setstatus
         # self.app.SetStatusText(str(self.app.tracker.frame_num), 1)
@@ -143,7 +185,18 @@ class ImagePanel(wx.Panel):
         :param evt: paint event, required param
         """
         if self.image_bmp is not None:
+            # only the newest frame queued since last paint needs copying
+            img = self.clear_paint_queue()
+            if img is not None:
+                self.image_bmp.CopyFromBuffer(img)
+
             dc = wx.BufferedPaintDC(self)
+
+            # only blit the part of the bitmap being repainted; clipping
+            # limits the draw without copying out a sub bitmap
+            update = self.GetUpdateRegion().GetBox()
+            dc.SetClippingRegion(update.x, update.y,
+                                 update.width, update.height)
             dc.Clear()
             dc.DrawBitmap(self.image_bmp, 0, 0)
         evt.Skip()
@@ -157,6 +210,7 @@ class ImagePanel(wx.Panel):
         """
         h = size[1]
         w = size[0]
+        self.clear_paint_queue()
         self.image_bmp = wx.BitmapFromBuffer(w, h, img)
         self.Refresh()  # causes paint
 
@@ -224,6 +278,10 @@ class ToolsPanel(wx.Panel):
         self.pip_toggle.SetValue(False)
         self.verbose_toggle = wx.CheckBox(self, label='Verbose')
         self.verbose_toggle.SetValue(False)
+        self.gray_toggle = wx.CheckBox(self, label='Gray')
+        self.gray_toggle.SetValue(False)
+        self.coast_toggle = wx.CheckBox(self, label='Coast')
+        self.coast_toggle.SetValue(False)
         self.save_video_toggle = wx.CheckBox(self, label='Save video')
         self.save_video_toggle.SetValue(False)
         self.dump_data_toggle = wx.CheckBox(self, label='Dump data')
@@ -284,6 +342,12 @@ class ToolsPanel(wx.Panel):
         button_sizer.Add(self.verbose_toggle,
                          flag=wx.LEFT | wx.RIGHT | wx.TOP,
                          border=5)
+        button_sizer.Add(self.gray_toggle,
+                         flag=wx.LEFT | wx.RIGHT | wx.TOP,
+                         border=5)
+        button_sizer.Add(self.coast_toggle,
+                         flag=wx.LEFT | wx.RIGHT | wx.TOP,
+                         border=5)
         button_sizer.Add(self.save_video_toggle,
                          flag=wx.LEFT | wx.RIGHT | wx.TOP,
                          border=5)
@@ -326,6 +390,12 @@ class ToolsPanel(wx.Panel):
         self.Bind(wx.EVT_CHECKBOX,
                   self.on_verbose_toggle,
                   self.verbose_toggle)
+        self.Bind(wx.EVT_CHECKBOX,
+                  self.on_gray_toggle,
+                  self.gray_toggle)
+        self.Bind(wx.EVT_CHECKBOX,
+                  self.on_coast_toggle,
+                  self.coast_toggle)
         self.Bind(wx.EVT_CHECKBOX,
                   self.on_save_video_toggle,
                   self.save_video_toggle)
@@ -504,6 +574,22 @@ class ToolsPanel(wx.Panel):
         """
         self.app.toggle_verbose(self.pupil_index, self.refle_index)
 
+    def on_gray_toggle(self, evt):
+        """
+        Toggles decoding frames to gray only.
+
+        :param evt: required event parameter
+        """
+        self.app.toggle_gray()
+
+    def on_coast_toggle(self, evt):
+        """
+        Toggles coasting steady pupils on predicted centers.
+
+        :param evt: required event parameter
+        """
+        self.app.toggle_coast()
+
     def on_save_video_toggle(self, evt):
         """
         Toggles video saving.
@@ -788,6 +874,8 @@ class MyFrame(wx.Frame):
         # instance attributes
         self.playing = False
         self.verbose = False
+        self.gray = False
+        self.coast = False
         self.to_plot = False
         self.to_pip = False
         self.to_save_video = False
@@ -801,6 +889,8 @@ class MyFrame(wx.Frame):
 
         # instantiate tracker
         self.tracker = PupilTracker(self)
+        # for searching for pupil and reflection at the same time
+        self.pool = ThreadPool(2)
 
         # create panels
         self.image_panel = ImagePanel(self)
@@ -890,6 +980,11 @@ class MyFrame(wx.Frame):
         """
         Plays video.
         """
+        try:
+            self.tracker.start_reader()
+        except IOError:
+            # print(e)
+            pass
         self.image_panel.start_timer()
         self.playing = True
 
@@ -898,6 +993,7 @@ class MyFrame(wx.Frame):
         Pauses video.
         """
         self.image_panel.stop_timer()
+        self.tracker.stop_reader()
         self.playing = False
 
         if self.to_save_video:
@@ -911,6 +1007,7 @@ class MyFrame(wx.Frame):
         Stops the video, returning to beginning.
         """
         self.image_panel.stop_timer()
+        self.tracker.stop_reader()
         self.playing = False
 
         if self.to_save_video:
@@ -1000,23 +1097,38 @@ class MyFrame(wx.Frame):
             print(e)
             pass
 
-    def track_pupil(self):
+    def track(self):
+        """
+        Tracks pupil and reflection every frame, searching for both at once
+        and then drawing pupil first.
+        """
+        pupils, refle = self.tracker.find_tracked(self.pool)
+        self.track_pupil(pupils)
+        self.track_refle(refle)
+
+    def track_pupil(self, cnt_list=None):
         """
         Tracks a pupil every frame.
+
+        :param cnt_list: possible pupils if already searched for
         """
-        self.tracker.track_pupil(verbose=self.verbose)
+        self.tracker.track_pupil(verbose=self.verbose, cnt_list=cnt_list)
 
-    def track_refle(self):
+    def track_refle(self, cnt_list=None):
         """
         Tracks a reflection every frame.
+
+        :param cnt_list: possible reflections if already searched for
         """
-        self.tracker.track_refle(verbose=self.verbose)
+        self.tracker.track_refle(verbose=self.verbose, cnt_list=cnt_list)
 
-    def next_frame(self):
+    def next_frame(self, skip=False):
         """
         Seeks to next frame.
+
+        :param skip: whether or not to skip frames faster than display rate
         """
-        self.tracker.next_frame()
+        self.tracker.next_frame(skip=skip)
 
     def prev_frame(self):
         """
@@ -1114,6 +1226,31 @@ class MyFrame(wx.Frame):
 
         self.update_plot()
 
+    def toggle_gray(self):
+        """
+        Toggles whether or not frames are decoded to gray only, which skips
+        the decoder's color conversion. Takes effect from the next frame.
+        """
+        if self.gray:
+            self.gray = False
+        else:
+            self.gray = True
+
+        self.tracker.set_decode_gray(self.gray)
+
+    def toggle_coast(self):
+        """
+        Toggles whether or not steady pupils are drawn at their predicted
+        center without searching for a few frames. Coasted frames record
+        predicted positions and no angle.
+        """
+        if self.coast:
+            self.coast = False
+        else:
+            self.coast = True
+
+        self.tracker.set_coast(self.coast)
+
     def toggle_to_save_video(self, set_to=None):
         """
         Toggles whether or not will save frames to video file.
@@ -1221,7 +1358,7 @@ class MyFrame(wx.Frame):
 
         width = self.image_panel.GetClientRect()[2]
 
-        self.tracker.init_cap(video_file, width)
+        self.tracker.init_cap(video_file, width, self.image_panel.fps)
 
         # load first frame
         self.load_frame(self.tracker.get_frame())
@@ -1339,6 +1476,7 @@ class MyFrame(wx.Frame):
         except IOError:
             # print(e)
             pass
+        self.pool.terminate()
         evt.Skip()
 
     def on_size(self, evt):